@@ -0,0 +1,188 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+from logic import *
+
+
+class Counter(Sentence):
+    """
+    Wraps a knowledge base and counts how many times it is evaluated,
+    which is the number of nodes explored by the model checker.
+    """
+
+    def __init__(self, sentence):
+        Sentence.validate(sentence)
+        self.sentence = sentence
+        self.nodes = 0
+
+    def evaluate(self, model):
+        self.nodes += 1
+        return self.sentence.evaluate(model)
+
+    def evaluate_partial(self, model):
+        self.nodes += 1
+        return self.sentence.evaluate_partial(model)
+
+    def formula(self):
+        return self.sentence.formula()
+
+    def symbols(self):
+        return self.sentence.symbols()
+
+
+def knights_puzzle(characters, rng=random):
+    """
+    Returns a random knights and knaves puzzle with the given number of
+    characters, as a tuple (knowledge, symbols), in the style of puzzle.py.
+    Each character makes one random statement about the others.
+    """
+    names = [f"Character {i}" for i in range(characters)]
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+
+    def statement(depth):
+        """Returns a random claim about the kinds of the characters."""
+        if depth == 0 or rng.random() < 0.3:
+            i = rng.randrange(characters)
+            return rng.choice([knights[i], knaves[i]])
+        kind = rng.choice(["not", "and", "or"])
+        if kind == "not":
+            return Not(statement(depth - 1))
+        operands = [statement(depth - 1) for _ in range(2)]
+        return And(*operands) if kind == "and" else Or(*operands)
+
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+
+        # Game rules: every character is exactly one of knight or knave
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+        # Knights tell the truth and knaves lie
+        said = statement(2)
+        knowledge.add(Implication(knight, said))
+        knowledge.add(Implication(knave, Not(said)))
+
+    return knowledge, knights + knaves
+
+
+def random_3sat(symbols, clauses, rng=random):
+    """
+    Returns a random 3-SAT instance with the given number of symbols and
+    clauses, as a tuple (knowledge, symbols).
+    """
+    variables = [Symbol(f"x{i}") for i in range(symbols)]
+    knowledge = And()
+    for _ in range(clauses):
+        literals = [
+            variable if rng.random() < 0.5 else Not(variable)
+            for variable in rng.sample(variables, 3)
+        ]
+        knowledge.add(Or(*literals))
+    return knowledge, variables
+
+
+def check_each(knowledge, queries):
+    """Backend answering each query with its own model_check."""
+    return [query for query in queries if model_check(knowledge, query)]
+
+
+def check_each_parallel(knowledge, queries):
+    """Backend answering each query with its own parallel_model_check."""
+    return [
+        query for query in queries
+        if parallel_model_check(knowledge, query)
+    ]
+
+
+BACKENDS = {
+    "model_check": check_each,
+    "parallel": check_each_parallel,
+    "entailed": entailed,
+}
+
+
+def run(backend, knowledge, queries):
+    """
+    Runs a backend on a problem and returns a dictionary with the
+    entailed queries, elapsed seconds, nodes explored and peak memory.
+    Nodes explored and memory used in worker processes are not counted.
+
+    Tracing memory slows down every allocation, so the backend is timed
+    in one run and its peak memory is measured in a second, traced run.
+    """
+    counter = Counter(knowledge)
+    start = time.perf_counter()
+    result = BACKENDS[backend](counter, queries)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    BACKENDS[backend](knowledge, queries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "entailed": result,
+        "seconds": elapsed,
+        "nodes": counter.nodes,
+        "memory": peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare entailment backends on generated problems."
+    )
+    parser.add_argument("--problem", choices=["knights", "3sat"],
+                        default="knights")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 5, 7],
+                        help="characters (knights) or symbols (3sat)")
+    parser.add_argument("--ratio", type=float, default=4.26,
+                        help="clauses per symbol for 3sat")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>6} {'backend':>12} {'seconds':>10} "
+          f"{'nodes':>10} {'memory':>10}")
+    for size in args.sizes:
+        totals = {
+            backend: {"seconds": 0, "nodes": 0, "memory": 0}
+            for backend in args.backends
+        }
+        for _ in range(args.trials):
+            if args.problem == "knights":
+                knowledge, queries = knights_puzzle(size, rng)
+            else:
+                clauses = round(size * args.ratio)
+                knowledge, queries = random_3sat(size, clauses, rng)
+
+            answers = dict()
+            for backend in args.backends:
+                stats = run(backend, knowledge, queries)
+                answers[backend] = stats.pop("entailed")
+                for key in stats:
+                    totals[backend][key] += stats[key]
+
+            # Every backend must agree on which queries are entailed
+            formulas = {
+                tuple(query.formula() for query in answer)
+                for answer in answers.values()
+            }
+            if len(formulas) > 1:
+                raise Exception(f"backends disagree: {answers}")
+
+        for backend in args.backends:
+            seconds = totals[backend]["seconds"] / args.trials
+            nodes = totals[backend]["nodes"] // args.trials
+            memory = totals[backend]["memory"] // args.trials
+            print(f"{size:>6} {backend:>12} {seconds:>10.4f} "
+                  f"{nodes:>10} {memory:>10}")
+
+
+if __name__ == "__main__":
+    main()
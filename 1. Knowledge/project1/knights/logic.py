@@ -1,4 +1,8 @@
 import itertools
+import math
+import multiprocessing
+import os
+import re
 
 
 class Sentence():
@@ -7,6 +11,14 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may not assign
+        every symbol. Returns True or False if the value is already
+        decided, or None if it depends on unassigned symbols.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -62,6 +74,10 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
@@ -86,6 +102,10 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
@@ -120,6 +140,17 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            # One false conjunct decides the whole conjunction
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -151,6 +182,17 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            # One true disjunct decides the whole disjunction
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -183,6 +225,17 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -216,48 +269,361 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def check_all(knowledge, query, symbols, model):
+    """Checks if knowledge base entails query, given a particular model."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    # If knowledge base is already false, no extension of model matters
+    knowledge_value = knowledge.evaluate_partial(model)
+    if knowledge_value is False:
+        return True
 
-        # If model has an assignment for each symbol
-        if not symbols:
+    # If query is already true, it is true in every extension of model
+    query_value = query.evaluate_partial(model)
+    if query_value is True:
+        return True
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+    # Knowledge base true and query false is a counterexample
+    if knowledge_value is True and query_value is False:
+        return False
+
+    # Every symbol is assigned, so both values must have been decided
+    if not symbols:
+        return True
+    else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def parallel_model_check(knowledge, query, processes=None, prefix=None):
+    """
+    Checks if knowledge base entails query, splitting the models across
+    a pool of worker processes.
+
+    The assignment space is partitioned by fixing the first `prefix`
+    symbols; each partition is checked independently and all workers
+    are stopped as soon as one of them finds a counterexample.
+    """
+
+    # Get all symbols in both knowledge and query, in a stable order
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    # By default, make a few partitions per worker to balance the load
+    if prefix is None:
+        prefix = math.ceil(math.log2(processes * 4))
+    prefix = max(0, min(prefix, len(symbols)))
+
+    fixed, free = symbols[:prefix], set(symbols[prefix:])
+    tasks = (
+        (knowledge, query, free, dict(zip(fixed, values)))
+        for values in itertools.product([True, False], repeat=len(fixed))
+    )
+
+    # Leaving the pool context terminates any worker still running
+    with multiprocessing.Pool(processes) as pool:
+        for entailed in pool.imap_unordered(_check_partition, tasks):
+            if not entailed:
+                return False
+    return True
+
+
+def _check_partition(task):
+    knowledge, query, symbols, model = task
+    return check_all(knowledge, query, symbols, model)
+
+
+def enumerate_models(knowledge, symbols=None):
+    """
+    Yields every model (a dict from symbol name to truth value) in which
+    the knowledge base is true. `symbols` may name extra symbols to
+    include in each model besides those of the knowledge base.
+    """
+
+    # Assign symbols in a stable order so models come out deterministically
+    symbols = sorted(set.union(knowledge.symbols(), set(symbols or ())))
+
+    def extend(model, index):
+        value = knowledge.evaluate_partial(model)
+
+        # Knowledge base already false, so no model in this branch
+        if value is False:
+            return
+
+        # Knowledge base already true, so every completion is a model
+        if value is True:
+            remaining = symbols[index:]
+            for values in itertools.product([True, False],
+                                            repeat=len(remaining)):
+                completed = model.copy()
+                completed.update(zip(remaining, values))
+                yield completed
+            return
+
+        # Otherwise branch on the next symbol
+        p = symbols[index]
+        for truth in (True, False):
+            model[p] = truth
+            yield from extend(model, index + 1)
+        del model[p]
+
+    yield from extend(dict(), 0)
+
+
+def count_models(knowledge, symbols=None):
+    """
+    Returns the number of models in which the knowledge base is true.
+
+    Top-level conjuncts that share no symbols are independent, so they
+    are split into components, each component is counted on its own and
+    the counts are multiplied.
+    """
+    symbols = set.union(knowledge.symbols(), set(symbols or ()))
+
+    count = 1
+    for component in components(knowledge):
+        count *= sum(1 for _ in enumerate_models(component))
+        if count == 0:
+            return 0
+        symbols -= component.symbols()
+
+    # Symbols not mentioned by any component can take either value
+    return count * 2 ** len(symbols)
+
+
+def entailed(knowledge, queries):
+    """
+    Returns the list of queries entailed by the knowledge base, using a
+    single enumeration of its models rather than one model check each.
+    """
+    queries = list(queries)
+    symbols = set()
+    for query in queries:
+        symbols |= query.symbols()
+
+    remaining = queries
+    for model in enumerate_models(knowledge, symbols):
+
+        # A query false in any model of the knowledge base is not entailed
+        remaining = [query for query in remaining if query.evaluate(model)]
+        if not remaining:
+            break
+
+    return remaining
+
+
+def components(knowledge):
+    """
+    Splits a knowledge base into conjunctions of its top-level conjuncts
+    such that no two of them share a symbol.
+    """
+
+    # Flatten nested conjunctions into one list of conjuncts
+    conjuncts = []
+    pending = [knowledge]
+    while pending:
+        sentence = pending.pop()
+        if isinstance(sentence, And):
+            pending.extend(reversed(sentence.conjuncts))
+        else:
+            conjuncts.append(sentence)
+
+    # Merge groups of conjuncts that share a symbol
+    groups = []
+    for conjunct in conjuncts:
+        group_symbols = conjunct.symbols()
+        group = [conjunct]
+        for other in list(groups):
+            if other[0] & group_symbols:
+                group_symbols |= other[0]
+                group = other[1] + group
+                groups.remove(other)
+        groups.append((group_symbols, group))
+
+    return [And(*group) for _, group in groups]
+
+
+# Operators accepted by the parser, including ASCII alternatives
+OPERATORS = {
+    "¬": "not", "~": "not", "!": "not",
+    "∧": "and", "&": "and",
+    "∨": "or", "|": "or",
+    "=>": "implies",
+    "<=>": "biconditional",
+}
+TOKENS = re.compile(r"(<=>|=>|[¬~!∧&∨|()])|([^¬~!∧&∨|()<=>-]+)|(.)")
+
+
+def parse(text, symbols=None):
+    """
+    Parses a formula written in the notation produced by `formula()`
+    and returns the corresponding Sentence.
+
+    `symbols` may be a dict from name to Symbol shared across calls, so
+    that each symbol is only created once when parsing many formulas.
+    """
+    if symbols is None:
+        symbols = dict()
+
+    # Split text into operators, parentheses and symbol names
+    tokens = []
+    for match in TOKENS.finditer(text):
+        operator, name, invalid = match.groups()
+        if operator:
+            tokens.append(operator)
+        elif invalid:
+            raise ValueError(f"unexpected {invalid!r} at {match.start()}")
+        else:
+            name = name.strip()
+            if name:
+                if name not in symbols:
+                    symbols[name] = Symbol(name)
+                tokens.append(symbols[name])
+    if not tokens:
+        raise ValueError("empty formula")
+
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def expect(token):
+        nonlocal position
+        if peek() != token:
+            raise ValueError(f"expected {token!r} at token {position}")
+        position += 1
+
+    def operator():
+        token = peek()
+        return OPERATORS.get(token) if isinstance(token, str) else None
+
+    def biconditional():
+        nonlocal position
+        left = implication()
+        while operator() == "biconditional":
+            position += 1
+            left = Biconditional(left, implication())
+        return left
+
+    def implication():
+        nonlocal position
+        operands = [disjunction()]
+        while operator() == "implies":
+            position += 1
+            operands.append(disjunction())
+
+        # Implication groups to the right
+        sentence = operands.pop()
+        while operands:
+            sentence = Implication(operands.pop(), sentence)
+        return sentence
+
+    def disjunction():
+        nonlocal position
+        disjuncts = [conjunction()]
+        while operator() == "or":
+            position += 1
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        nonlocal position
+        conjuncts = [negation()]
+        while operator() == "and":
+            position += 1
+            conjuncts.append(negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation():
+        nonlocal position
+        count = 0
+        while operator() == "not":
+            position += 1
+            count += 1
+        sentence = atom()
+        for _ in range(count):
+            sentence = Not(sentence)
+        return sentence
+
+    def atom():
+        nonlocal position
+        token = peek()
+        if isinstance(token, Symbol):
+            position += 1
+            return token
+        if token == "(":
+            position += 1
+            sentence = biconditional()
+            expect(")")
+            return sentence
+        raise ValueError(f"unexpected {token!r} at token {position}")
+
+    try:
+        sentence = biconditional()
+    except RecursionError:
+        raise ValueError("formula is nested too deeply") from None
+    if position != len(tokens):
+        raise ValueError(f"unexpected {peek()!r} at token {position}")
+    return sentence
+
+
+def parse_file(filename, symbols=None):
+    """
+    Yields one Sentence for each line of a file of formulas, skipping
+    blank lines and lines starting with "#". The file is read one line
+    at a time, so large rule sets are never fully loaded into memory.
+    """
+    if symbols is None:
+        symbols = dict()
+    with open(filename, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield parse(line, symbols)
+            except ValueError as e:
+                raise ValueError(f"{filename}, line {number}: {e}") from None
@@ -102,9 +102,8 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            for symbol in entailed(knowledge, symbols):
+                print(f"    {symbol}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,10 @@
 import itertools
+import json
+import math
 import random
+import time
+
+import numpy as np
 
 
 class Minesweeper():
@@ -12,27 +17,37 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.place_mines(random.sample(range(height * width), mines))
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    def place_mines(self, positions):
+        """
+        Places mines at the given positions, where position
+        i * width + j is cell (i, j), replacing any existing mines.
+        """
+
+        # The bit i * width + j of the board is set if cell (i, j) is a mine
+        self.mines = set()
+        self.board = 0
+        grid = np.zeros((self.height, self.width), dtype=np.int8)
+        for position in positions:
+            i, j = divmod(position, self.width)
+            self.mines.add((i, j))
+            self.board |= 1 << position
+            grid[i, j] = 1
+
+        # Count the mines around every cell at once, by adding up the
+        # grid shifted in each of the eight directions
+        padded = np.pad(grid, 1)
+        self.counts = sum(
+            padded[1 + di:1 + di + self.height, 1 + dj:1 + dj + self.width]
+            for di in (-1, 0, 1) for dj in (-1, 0, 1)
+        ) - grid
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +56,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.is_mine((i, j)):
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +65,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board >> (i * self.width + j) & 1)
 
     def nearby_mines(self, cell):
         """
@@ -59,23 +74,35 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
+        i, j = cell
+        return int(self.counts[i, j])
 
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
+    def reveal(self, cell, revealed=()):
+        """
+        Reveals a safe cell and, if it has no nearby mines, every cell
+        connected to it through cells with no nearby mines, skipping
+        cells in `revealed`.
 
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+        Returns a dictionary mapping each revealed cell to its number
+        of nearby mines.
+        """
+        counts = {cell: self.nearby_mines(cell)}
+        pending = [cell]
+        while pending:
+            i, j = pending.pop()
+            if counts[(i, j)] != 0:
+                continue
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+            # Neighbors of a cell with no nearby mines are all safe
+            for row in range(max(i - 1, 0), min(i + 2, self.height)):
+                for column in range(max(j - 1, 0), min(j + 2, self.width)):
+                    neighbor = (row, column)
+                    if neighbor in counts or neighbor in revealed:
+                        continue
+                    counts[neighbor] = self.nearby_mines(neighbor)
+                    pending.append(neighbor)
 
-        return count
+        return counts
 
     def won(self):
         """
@@ -148,17 +175,195 @@ class Sentence():
         self.cells.discard(cell) 
 
 
+# Width of the box in which the cells of a BitSentence are numbered,
+# and the mask of one row of it
+STRIDE = 8
+ROW = (1 << STRIDE) - 1
+
+# Row and column of each bit set in a mask, and the first row and
+# column with a bit set, by mask, as only a few hundred masks occur
+OFFSETS = dict()
+CORNERS = dict()
+
+
+def offsets(mask):
+    """
+    Returns the list of (row, column) offsets of the bits set in `mask`.
+    """
+    if mask not in OFFSETS:
+        found = []
+        rest = mask
+        while rest:
+            low = rest & -rest
+            found.append(divmod(low.bit_length() - 1, STRIDE))
+            rest ^= low
+        OFFSETS[mask] = found
+    return OFFSETS[mask]
+
+
+def corner(mask):
+    """
+    Returns the first row and the first column with a bit set in `mask`.
+    """
+    if mask not in CORNERS:
+        columns = 0
+        rest = mask
+        while rest:
+            columns |= rest & ROW
+            rest >>= STRIDE
+        CORNERS[mask] = (
+            ((mask & -mask).bit_length() - 1) // STRIDE,
+            (columns & -columns).bit_length() - 1
+        )
+    return CORNERS[mask]
+
+
+class BitSentence():
+    """
+    Sentence whose cells are the set bits of a small integer mask, so
+    that subset tests and differences between sentences are integer
+    operations.
+
+    Cell (row + a, column + b) is bit a * STRIDE + b, where (row, column)
+    is the top left corner of the box around the sentence's cells. The
+    cells of a sentence are always neighbors of one cell, so masks stay
+    a few bits long whatever the size of the board.
+    """
+
+    def __init__(self, row, column, mask, count):
+        self.row = row
+        self.column = column
+        self.mask = mask
+        self.count = count
+        self.normalize()
+
+    @classmethod
+    def from_cells(cls, cells, count):
+        """
+        Returns the sentence that `count` of `cells` are mines.
+        """
+        cells = list(cells)
+        if not cells:
+            return cls(0, 0, 0, count)
+
+        # Number the cells from a corner two rows and columns before the
+        # first one, which is before every cell within reach of it
+        row, column = cells[0][0] - 2, cells[0][1] - 2
+        mask = 0
+        for i, j in cells:
+            mask |= 1 << ((i - row) * STRIDE + j - column)
+        return cls(row, column, mask, count)
+
+    def __eq__(self, other):
+        return (self.signature() == other.signature()
+                and self.count == other.count)
+
+    def __str__(self):
+        return f"{set(self.cells())} = {self.count}"
+
+    def signature(self):
+        """
+        Returns a tuple that is the same for sentences about the same
+        cells, and different otherwise.
+        """
+        return self.row, self.column, self.mask
+
+    def normalize(self):
+        """
+        Moves the corner of the box to the first row and column that
+        have a cell, so that each set of cells has a single signature.
+        """
+        if not self.mask:
+            return
+        rows, columns = corner(self.mask)
+        if rows or columns:
+            self.mask >>= rows * STRIDE + columns
+            self.row += rows
+            self.column += columns
+
+    def bit(self, cell):
+        """
+        Returns the mask with only the bit for `cell` set, or 0 if the
+        cell is outside the box.
+        """
+        a, b = cell[0] - self.row, cell[1] - self.column
+        if 0 <= a and 0 <= b < STRIDE:
+            return 1 << (a * STRIDE + b)
+        return 0
+
+    def cells(self, mask=None):
+        """
+        Returns the list of cells whose bits are set in `mask`, or in
+        the sentence's own mask if not given.
+        """
+        if mask is None:
+            mask = self.mask
+        return [(self.row + a, self.column + b) for a, b in offsets(mask)]
+
+    def align(self, other):
+        """
+        Returns the masks of this sentence and of `other` numbered from
+        the same corner, as a tuple (row, column, mask, other_mask).
+        The two sentences must share a cell.
+        """
+        row = min(self.row, other.row)
+        column = min(self.column, other.column)
+        return (
+            row, column,
+            self.mask << ((self.row - row) * STRIDE + self.column - column),
+            other.mask << ((other.row - row) * STRIDE + other.column - column)
+        )
+
+    def known_mines(self):
+        """
+        Returns the mask of all cells in self.mask known to be mines.
+        """
+        if self.mask.bit_count() == self.count:
+            return self.mask
+        return 0
+
+    def known_safes(self):
+        """
+        Returns the mask of all cells in self.mask known to be safe.
+        """
+        if self.count == 0:
+            return self.mask
+        return 0
+
+    def mark_mine(self, cell):
+        """
+        Updates the sentence given that `cell` is known to be a mine.
+        """
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self.count -= 1
+            self.normalize()
+
+    def mark_safe(self, cell):
+        """
+        Updates the sentence given that `cell` is known to be safe.
+        """
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self.normalize()
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, profile=False):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -166,8 +371,38 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells not known to be safe or mines, in a list that allows
+        # choosing one at random, with the position of each cell in it
+        self.undecided = [
+            (i, j) for i in range(height) for j in range(width)
+        ]
+        self.positions = {
+            cell: position for position, cell in enumerate(self.undecided)
+        }
+
+        # Safe cells not played yet, kept the same way
+        self.playable = []
+        self.playable_positions = dict()
+
+        # Sentences about the game known to be true, by key
+        self.knowledge = dict()
+        self.next_key = 0
+
+        # Keys of the sentences that mention each cell
+        self.index = dict()
+
+        # Key of the sentence about each set of cells, so that the
+        # same sentence is never stored twice
+        self.signatures = dict()
+
+        # Keys of the sentences changed since they were last checked
+        self.changed = set()
+
+        # Mine configurations of groups of sentences, by their contents
+        self.configurations = dict()
+
+        # One record per update of the knowledge base, if profiling
+        self.profile = [] if profile else None
 
     def mark_mine(self, cell):
         """
@@ -175,8 +410,14 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.decide(cell)
+
+        # Only the sentences that mention the cell need updating
+        for key in self.index.pop(cell, ()):
+            sentence = self.knowledge[key]
+            del self.signatures[sentence.signature()]
             sentence.mark_mine(cell)
+            self.refile(key)
 
     def mark_safe(self, cell):
         """
@@ -184,8 +425,126 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        self.decide(cell)
+        if cell not in self.moves_made:
+            self.playable_positions[cell] = len(self.playable)
+            self.playable.append(cell)
+
+        # Only the sentences that mention the cell need updating
+        for key in self.index.pop(cell, ()):
+            sentence = self.knowledge[key]
+            del self.signatures[sentence.signature()]
             sentence.mark_safe(cell)
+            self.refile(key)
+
+    def decide(self, cell):
+        """
+        Removes a cell from the undecided cells.
+        """
+        remove(self.undecided, self.positions, cell)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and indexes it by cell,
+        unless it is empty or already known.
+        """
+
+        # Apply what is already known about the sentence's cells
+        for cell in sentence.cells():
+            if cell in self.mines:
+                sentence.mark_mine(cell)
+            elif cell in self.safes:
+                sentence.mark_safe(cell)
+
+        if not sentence.mask or sentence.signature() in self.signatures:
+            return
+
+        key = self.next_key
+        self.next_key += 1
+        self.knowledge[key] = sentence
+        self.signatures[sentence.signature()] = key
+        for cell in sentence.cells():
+            self.index.setdefault(cell, set()).add(key)
+        self.changed.add(key)
+
+    def refile(self, key):
+        """
+        Files a sentence again after its cells changed, removing it
+        if it became empty or a duplicate of another sentence.
+        """
+        sentence = self.knowledge[key]
+
+        if not sentence.mask or sentence.signature() in self.signatures:
+            del self.knowledge[key]
+            for cell in sentence.cells():
+                self.index[cell].discard(key)
+            self.changed.discard(key)
+            return
+
+        self.signatures[sentence.signature()] = key
+        self.changed.add(key)
+
+    def infer(self):
+        """
+        Draws conclusions from changed sentences until nothing new
+        can be concluded.
+
+        Each changed sentence either shows its cells to be mines or
+        safe, or is compared with the sentences sharing a cell with it
+        to infer new sentences with the subset method.
+
+        Returns the seconds spent marking cells and inferring new
+        sentences, respectively, which are only measured if profiling.
+        """
+        timing = self.profile is not None
+        marking = 0
+        subset = 0
+
+        while self.changed:
+            if timing:
+                start = time.perf_counter()
+            key = self.changed.pop()
+            sentence = self.knowledge[key]
+
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+
+            # marking removes every cell, and with them the sentence
+            if mines or safes:
+                for cell in sentence.cells(mines):
+                    self.mark_mine(cell)
+                for cell in sentence.cells(safes):
+                    self.mark_safe(cell)
+                if timing:
+                    marking += time.perf_counter() - start
+                continue
+
+            # Only sentences sharing a cell can be subsets of each other
+            keys = set()
+            for cell in sentence.cells():
+                keys |= self.index[cell]
+            keys.discard(key)
+
+            for other_key in keys:
+                other = self.knowledge[other_key]
+                row, column, mask, other_mask = sentence.align(other)
+                common = mask & other_mask
+
+                # subset method, in whichever direction applies
+                if common == mask:
+                    self.add_sentence(BitSentence(
+                        row, column, other_mask ^ common,
+                        other.count - sentence.count
+                    ))
+                elif common == other_mask:
+                    self.add_sentence(BitSentence(
+                        row, column, mask ^ common,
+                        sentence.count - other.count
+                    ))
+            if timing:
+                subset += time.perf_counter() - start
+
+        return marking, subset
 
     def add_knowledge(self, cell, count):
         """
@@ -202,48 +561,56 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        
-        # mark move
-        self.moves_made.add(cell)
+        self.add_all_knowledge({cell: count})
 
-        # mark as safe cell
-        if cell not in self.safes:
-            self.mark_safe(cell)
-
-        # add new sentence to KB
-        sentence = Sentence(self.get_neighbors(cell), count)
-        self.knowledge.append(sentence)    
-        
-        # mark any additional cells as safe or as mines
-        for sentence in self.knowledge:
-            # discart empty sentences
-            if not sentence.cells:
-                self.knowledge.remove(sentence)
-
-            mines = sentence.known_mines().copy()
-            safes = sentence.known_safes().copy()
-
-            for cell in mines:
-                self.mark_mine(cell)
-            for cell in safes:
-                self.mark_safe(cell)
+    def add_all_knowledge(self, counts):
+        """
+        Adds what the Minesweeper board tells us about many safe cells
+        at once, given a dictionary mapping each cell to how many
+        neighboring cells have mines in them, and draws conclusions
+        from all of it in a single round of inference.
+        """
+        if self.profile is not None:
+            start = time.perf_counter()
 
-        # try to infer new sentences
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                if sentence1 == sentence2: continue
-                
-                if sentence1.cells > sentence2.cells:
-                    # subset method
-                    new_cells = sentence1.cells - sentence2.cells
-                    new_count = sentence1.count - sentence2.count
+        for cell in counts:
+            # mark move
+            self.moves_made.add(cell)
+            remove(self.playable, self.playable_positions, cell)
 
-                    # create new sentence
-                    new_sentence = Sentence(new_cells, new_count)
-                    if new_sentence not in self.knowledge:
-                        self.knowledge.append(new_sentence)
-          
+            # mark as safe cell
+            if cell not in self.safes:
+                self.mark_safe(cell)
 
+        # add new sentences to KB
+        for cell, count in counts.items():
+            neighbors = self.get_neighbors(cell)
+            self.add_sentence(BitSentence.from_cells(neighbors, count))
+
+        # mark cells and infer new sentences until nothing changes
+        added = self.next_key
+        decided = len(self.mines), len(self.safes)
+        marking, subset = self.infer()
+
+        if self.profile is not None:
+            self.profile.append({
+                "cells": len(counts),
+                "seconds": time.perf_counter() - start,
+                "marking_seconds": marking,
+                "subset_seconds": subset,
+                "sentences": len(self.knowledge),
+                "derived": self.next_key - added,
+                "mines_resolved": len(self.mines) - decided[0],
+                "safes_resolved": len(self.safes) - decided[1],
+            })
+
+    def save_profile(self, filename):
+        """
+        Writes the profiling records, one JSON object per line.
+        """
+        with open(filename, "w") as f:
+            for record in self.profile:
+                f.write(json.dumps(record) + "\n")
 
     def make_safe_move(self):
         """
@@ -256,12 +623,10 @@ class MinesweeperAI():
         """
         
         # choose a random safe move
-        available_moves = self.safes.difference(self.moves_made)
+        if self.playable:
+            return random.choice(self.playable)
 
-        if available_moves:
-            return random.choice(list(available_moves))
-
-        return None        
+        return None
 
     def make_random_move(self):
         """
@@ -269,17 +634,128 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        If the total number of mines is known, chooses randomly among
+        the cells least likely to be a mine instead.
         """
-        available_moves = []
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i, j) not in [*self.mines, *self.safes, *self.moves_made]:
-                    available_moves.append((i, j))
-        
-        if available_moves:
-            return random.choice(available_moves)
+        if not self.undecided:
+            return None
+
+        if self.total_mines is not None:
+            probabilities = self.mine_probabilities(self.undecided)
+            if probabilities:
+                lowest = min(probabilities.values())
+                return random.choice([
+                    cell for cell in self.undecided
+                    if probabilities[cell] == lowest
+                ])
 
-        return None    
+        return random.choice(self.undecided)
+
+    def mine_probabilities(self, unknown):
+        """
+        Returns the exact probability that each of the `unknown` cells is
+        a mine, given the knowledge base and the total number of mines,
+        assuming every consistent placement of mines is equally likely.
+        Returns None if the knowledge base has no consistent placement.
+
+        The cells mentioned by the knowledge base are split into groups
+        that share no sentence. Mine placements are enumerated for each
+        group on its own, and then combined with the number of ways to
+        place the rest of the mines in the cells outside every group.
+        """
+
+        # Split the sentences into groups sharing no cell
+        groups = []
+        seen = set()
+        for key in self.knowledge:
+            if key in seen:
+                continue
+            seen.add(key)
+            group = []
+            pending = [key]
+            while pending:
+                sentence = self.knowledge[pending.pop()]
+                group.append(sentence)
+                for cell in sentence.cells():
+                    for other in self.index[cell] - seen:
+                        seen.add(other)
+                        pending.append(other)
+            groups.append(group)
+
+        # Enumerate placements of each group, reusing previous results
+        configurations = dict()
+        results = []
+        for group in groups:
+            contents = frozenset(
+                (sentence.signature(), sentence.count) for sentence in group
+            )
+            if contents in self.configurations:
+                result = self.configurations[contents]
+            else:
+                result = count_configurations([
+                    Sentence(sentence.cells(), sentence.count)
+                    for sentence in group
+                ])
+            configurations[contents] = result
+            results.append(result)
+        self.configurations = configurations
+
+        # Cells outside every group, and mines left to place
+        frontier = set()
+        for cells, _ in results:
+            frontier.update(cells)
+        outside = len([cell for cell in unknown if cell not in frontier])
+        mines_left = self.total_mines - len(self.mines)
+
+        def completions(k, fixed=0):
+            """
+            Number of ways to place the mines left outside the groups,
+            given k mines in the groups and `fixed` outside cells
+            already known to be mines.
+            """
+            rest = mines_left - k - fixed
+            if rest < 0 or rest > outside - fixed:
+                return 0
+            return math.comb(outside - fixed, rest)
+
+        # Placements of each group, by number of mines
+        counts = [
+            {k: count for k, (count, _) in totals.items()}
+            for _, totals in results
+        ]
+        ways = combine(counts)
+        total = sum(count * completions(k) for k, count in ways.items())
+        if total == 0:
+            return None
+
+        probabilities = dict()
+        for i, (cells, totals) in enumerate(results):
+
+            # Placements of every group except this one
+            others = combine(counts[:i] + counts[i + 1:])
+
+            mine_weights = [0] * len(cells)
+            for k, (_, mine_counts) in totals.items():
+                weight = sum(
+                    count * completions(k + k_other)
+                    for k_other, count in others.items()
+                )
+                for c, mine_count in enumerate(mine_counts):
+                    mine_weights[c] += mine_count * weight
+            for cell, mine_weight in zip(cells, mine_weights):
+                probabilities[cell] = mine_weight / total
+
+        # Every cell outside the groups is equally likely to be a mine
+        if outside:
+            outside_weight = sum(
+                count * completions(k, fixed=1) for k, count in ways.items()
+            )
+            for cell in unknown:
+                if cell not in frontier:
+                    probabilities[cell] = outside_weight / total
+
+        return probabilities
 
     def get_neighbors(self, cell):
         i, j = cell
@@ -295,7 +771,7 @@ class MinesweeperAI():
             if self.is_out(neighbor):
                 continue
 
-            if neighbor in [*self.safes, *self.moves_made]:
+            if neighbor in self.safes or neighbor in self.moves_made:
                 continue
 
             neighbors.add(neighbor) 
@@ -312,3 +788,89 @@ class MinesweeperAI():
             return True    
 
         return False    
+
+
+def remove(cells, positions, cell):
+    """
+    Removes a cell from a list of cells, given a dictionary with the
+    position of each cell in the list, by moving the last cell into
+    its position.
+    """
+    position = positions.pop(cell, None)
+    if position is None:
+        return
+    last = cells.pop()
+    if last != cell:
+        cells[position] = last
+        positions[last] = position
+
+
+def count_configurations(sentences):
+    """
+    Enumerates every placement of mines in the cells of `sentences`
+    that makes all of them true, by backtracking over the cells.
+
+    Returns a tuple (cells, totals), where cells is a list of the cells
+    and totals maps each number of mines k to a tuple with the number
+    of placements of k mines and, for each cell, the number of those
+    placements in which the cell is a mine.
+    """
+
+    # Order cells so that neighboring cells are assigned together
+    cells = []
+    constraints = dict()
+    for i, sentence in enumerate(sentences):
+        for cell in sentence.cells:
+            if cell not in constraints:
+                constraints[cell] = []
+                cells.append(cell)
+            constraints[cell].append(i)
+    constraints = [constraints[cell] for cell in cells]
+
+    # Mines still to be placed, and cells still unassigned, per sentence
+    remaining = [sentence.count for sentence in sentences]
+    unassigned = [len(sentence.cells) for sentence in sentences]
+
+    assignment = [0] * len(cells)
+    totals = dict()
+
+    def place(i, mines):
+        if i == len(cells):
+            count, mine_counts = totals.get(mines, (0, [0] * len(cells)))
+            for c, value in enumerate(assignment):
+                mine_counts[c] += value
+            totals[mines] = (count + 1, mine_counts)
+            return
+
+        for value in (0, 1):
+            for j in constraints[i]:
+                remaining[j] -= value
+                unassigned[j] -= 1
+
+            # Every sentence must still be satisfiable
+            if all(0 <= remaining[j] <= unassigned[j]
+                   for j in constraints[i]):
+                assignment[i] = value
+                place(i + 1, mines + value)
+
+            for j in constraints[i]:
+                remaining[j] += value
+                unassigned[j] += 1
+
+    place(0, 0)
+    return cells, totals
+
+
+def combine(distributions):
+    """
+    Combines independent distributions, each mapping a number of mines
+    to a number of placements, into the distribution of their total.
+    """
+    combined = {0: 1}
+    for distribution in distributions:
+        result = dict()
+        for k1, count1 in combined.items():
+            for k2, count2 in distribution.items():
+                result[k1 + k2] = result.get(k1 + k2, 0) + count1 * count2
+        combined = result
+    return combined
@@ -2,12 +2,16 @@ import pygame
 import sys
 import time
 
+import snapshot
 from minesweeper import Minesweeper, MinesweeperAI
 
 HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# File where the game in progress is saved and loaded
+CHECKPOINT = "checkpoint.mswp"
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -39,7 +43,7 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -56,6 +60,27 @@ while True:
         if event.type == pygame.QUIT:
             sys.exit()
 
+        # Save or load the game in progress
+        if event.type == pygame.KEYDOWN and not instructions:
+            if event.key == pygame.K_s:
+                try:
+                    snapshot.save(CHECKPOINT, game, ai, revealed, flags, lost)
+                except OSError as error:
+                    print(f"Could not save {CHECKPOINT}: {error}")
+                    continue
+                print(f"Game saved to {CHECKPOINT}.")
+            elif event.key == pygame.K_l:
+                try:
+                    loaded = snapshot.load(CHECKPOINT)
+                except (OSError, ValueError) as error:
+                    print(f"Could not load {CHECKPOINT}: {error}")
+                    continue
+                if (loaded[0].height, loaded[0].width) != (HEIGHT, WIDTH):
+                    print(f"Saved game is not {HEIGHT}x{WIDTH}.")
+                    continue
+                game, ai, revealed, flags, lost = loaded
+                print(f"Game loaded from {CHECKPOINT}.")
+
     screen.fill(BLACK)
 
     # Show game instructions
@@ -71,7 +96,8 @@ while True:
         rules = [
             "Click a cell to reveal it.",
             "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
+            "Mark all mines successfully to win!",
+            "Press S to save the game and L to load it."
         ]
         for i, rule in enumerate(rules):
             line = smallFont.render(rule, True, WHITE)
@@ -195,7 +221,7 @@ while True:
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
@@ -215,8 +241,8 @@ while True:
         if game.is_mine(move):
             lost = True
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            counts = game.reveal(move, revealed)
+            revealed.update(counts)
+            ai.add_all_knowledge(counts)
 
     pygame.display.flip()
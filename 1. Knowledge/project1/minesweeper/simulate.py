@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import time
+
+import snapshot
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(height, width, mines, seed, known_mines=False, flood_fill=True,
+         profile=False, start=None):
+    """
+    Plays one game between Minesweeper and MinesweeperAI without a
+    display, the way runner.py does when the AI button is pressed.
+    Unless `flood_fill` is False, revealing a cell with no nearby mines
+    reveals its whole region, as in runner.py. If `profile` is True,
+    the AI's profiling records are included in the result. If `start`
+    is a snapshot, the game continues from it instead of a new board.
+
+    Returns a dictionary describing the game: whether it was won, the
+    moves made, the time spent in add_knowledge for each move, and the
+    size of the knowledge base after each move.
+    """
+    random.seed(seed)
+    if start is None:
+        game = Minesweeper(height=height, width=width, mines=mines)
+        ai = MinesweeperAI(
+            height=height, width=width,
+            mines=mines if known_mines else None, profile=profile
+        )
+        revealed = set()
+    else:
+        game, ai, revealed, _, _ = snapshot.loads(start)
+        ai.profile = [] if profile else None
+
+    moves = []
+    inference = []
+    knowledge = []
+    won = False
+    start = time.perf_counter()
+
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+
+            # No moves left, so the game is won if every mine is flagged
+            if move is None:
+                won = ai.mines == game.mines
+                break
+
+        moves.append(move)
+        if game.is_mine(move):
+            break
+
+        if flood_fill:
+            counts = game.reveal(move, revealed)
+        else:
+            counts = {move: game.nearby_mines(move)}
+        revealed.update(counts)
+        before = time.perf_counter()
+        ai.add_all_knowledge(counts)
+        inference.append(time.perf_counter() - before)
+        knowledge.append(len(ai.knowledge))
+
+    return {
+        "seed": seed,
+        "won": won,
+        "seconds": time.perf_counter() - start,
+        "moves": moves,
+        "inference": inference,
+        "knowledge": knowledge,
+        "profile": ai.profile,
+    }
+
+
+def digest(moves):
+    """Returns a short fingerprint of a sequence of moves."""
+    return hashlib.sha1(json.dumps(moves).encode()).hexdigest()[:16]
+
+
+def play_task(task):
+    return play(*task)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many Minesweeper games with the AI, headless."
+    )
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--known-mines", action="store_true",
+                        help="tell the AI how many mines there are")
+    parser.add_argument("--no-flood-fill", action="store_true",
+                        help="reveal one cell per move, even with no "
+                             "nearby mines")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write the AI's inference profile of every "
+                             "game as JSON lines")
+    parser.add_argument("--snapshot", metavar="FILE",
+                        help="continue every game from a saved snapshot, "
+                             "ignoring the board size options")
+    parser.add_argument("--save", metavar="FILE",
+                        help="write a fingerprint of each game's moves")
+    parser.add_argument("--check", metavar="FILE",
+                        help="compare each game's moves with a saved run")
+    args = parser.parse_args()
+
+    start = None
+    if args.snapshot:
+        with open(args.snapshot, "rb") as f:
+            start = f.read()
+        game, *_ = snapshot.loads(start)
+        args.height, args.width = game.height, game.width
+        args.mines = len(game.mines)
+
+    tasks = [
+        (args.height, args.width, args.mines, seed, args.known_mines,
+         not args.no_flood_fill, args.profile is not None, start)
+        for seed in range(args.seed, args.seed + args.games)
+    ]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        games = pool.map(play_task, tasks, chunksize=16)
+    elapsed = time.perf_counter() - start
+
+    # Totals over all games
+    wins = sum(game["won"] for game in games)
+    moves = sum(len(game["moves"]) for game in games)
+    playing = sum(game["seconds"] for game in games)
+    inference = [seconds for game in games for seconds in game["inference"]]
+    longest = max(len(game["knowledge"]) for game in games)
+
+    print(f"Games: {args.games} on {args.height}x{args.width} "
+          f"with {args.mines} mines")
+    print(f"Win rate: {wins / args.games:.2%}")
+    print(f"Moves per second: {moves / playing:.0f} "
+          f"({elapsed:.2f}s wall clock)")
+    if inference:
+        print(f"Inference per move: "
+              f"{1000 * sum(inference) / len(inference):.3f}ms mean, "
+              f"{1000 * max(inference):.3f}ms max")
+
+    # Average size of the knowledge base at each stage of the games
+    print("Knowledge base size by move:")
+    step = max(1, longest // 10)
+    for move in range(0, longest, step):
+        sizes = [
+            game["knowledge"][move] for game in games
+            if move < len(game["knowledge"])
+        ]
+        print(f"  {move + 1:>6}: {sum(sizes) / len(sizes):.1f} "
+              f"({len(sizes)} games)")
+
+    if args.profile:
+        with open(args.profile, "w") as f:
+            for game in games:
+                for move, record in enumerate(game["profile"]):
+                    record = {"seed": game["seed"], "move": move, **record}
+                    f.write(json.dumps(record) + "\n")
+
+    fingerprints = {game["seed"]: digest(game["moves"]) for game in games}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(fingerprints, f, indent=4)
+    if args.check:
+        with open(args.check) as f:
+            saved = {int(seed): value for seed, value in json.load(f).items()}
+        different = [
+            seed for seed in fingerprints
+            if seed in saved and saved[seed] != fingerprints[seed]
+        ]
+        if different:
+            print(f"Moves differ from {args.check} in {len(different)} "
+                  f"games, e.g. seed {different[0]}")
+        else:
+            print(f"Moves match {args.check}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import struct
+import zlib
+
+from minesweeper import BitSentence, Minesweeper, MinesweeperAI
+
+# Identifies snapshot files, followed by the format version
+MAGIC = b"MSWP\x02"
+
+# Board height and width, total mines (-1 if unknown to the AI),
+# number of mines, revealed cells, flagged cells, mines found, moves,
+# safe cells, known mines and sentences, and whether the game is lost
+HEADER = struct.Struct("<IIiIIIIIIIIB")
+
+
+def dumps(game, ai, revealed, flags=(), lost=False):
+    """
+    Returns a compact binary snapshot of a game in progress: the board,
+    the revealed and flagged cells, whether the game is lost, and the
+    AI's moves, known cells and sentences.
+    """
+    width = game.width
+
+    def positions(cells):
+        return [i * width + j for i, j in cells]
+
+    mines = positions(game.mines)
+    groups = [
+        positions(revealed),
+        positions(flags),
+        positions(game.mines_found),
+        positions(ai.moves_made),
+        positions(ai.safes),
+        positions(ai.mines),
+    ]
+    sentences = list(ai.knowledge.values())
+
+    total = -1 if ai.total_mines is None else ai.total_mines
+    parts = [HEADER.pack(
+        game.height, game.width, total, len(mines),
+        *[len(group) for group in groups], len(sentences), lost
+    )]
+
+    # Every cell is stored as its position i * width + j
+    for group in [mines, *groups]:
+        parts.append(struct.pack(f"<{len(group)}I", *group))
+
+    # Each sentence is its count, its number of cells, and the cells
+    for sentence in sentences:
+        cells = [i * width + j for i, j in sentence.cells()]
+        parts.append(struct.pack(
+            f"<iI{len(cells)}I", sentence.count, len(cells), *cells
+        ))
+
+    return MAGIC + zlib.compress(b"".join(parts))
+
+
+def loads(data):
+    """
+    Rebuilds a game from a snapshot made by `dumps`.
+    Returns a tuple (game, ai, revealed, flags, lost).
+    """
+    if not data.startswith(MAGIC[:-1]):
+        raise ValueError("not a Minesweeper snapshot")
+    if not data.startswith(MAGIC):
+        raise ValueError("unsupported Minesweeper snapshot version")
+
+    # A truncated or corrupted file fails anywhere while unpacking
+    try:
+        return unpack(zlib.decompress(data[len(MAGIC):]))
+    except (zlib.error, struct.error, IndexError) as error:
+        raise ValueError(f"corrupt Minesweeper snapshot: {error}") from None
+
+
+def unpack(data):
+    """
+    Rebuilds a game from the decompressed contents of a snapshot.
+    Returns a tuple (game, ai, revealed, flags, lost).
+    """
+    (height, width, total, *sizes, count, lost) = HEADER.unpack_from(data)
+    offset = HEADER.size
+
+    def cells(n):
+        nonlocal offset
+        positions = struct.unpack_from(f"<{n}I", data, offset)
+        offset += 4 * n
+        return positions
+
+    game = Minesweeper(height=height, width=width, mines=0)
+    game.place_mines(cells(sizes[0]))
+
+    revealed, flags, found, moves, safes, mines = [
+        [divmod(position, width) for position in cells(n)]
+        for n in sizes[1:]
+    ]
+
+    game.mines_found.update(found)
+
+    ai = MinesweeperAI(
+        height=height, width=width, mines=None if total < 0 else total
+    )
+    ai.moves_made.update(moves)
+    for cell in safes:
+        ai.mark_safe(cell)
+    for cell in mines:
+        ai.mark_mine(cell)
+
+    for _ in range(count):
+        mine_count, n = struct.unpack_from("<iI", data, offset)
+        offset += 8
+        ai.add_sentence(BitSentence.from_cells(
+            [divmod(position, width) for position in cells(n)], mine_count
+        ))
+
+    # Sentences were saved after inference, so none needs checking again
+    ai.changed.clear()
+
+    return game, ai, set(revealed), set(flags), bool(lost)
+
+
+def save(filename, game, ai, revealed, flags=(), lost=False):
+    """
+    Writes a snapshot of a game in progress to a file. The file is
+    replaced at once, so a failed save leaves any previous one intact.
+    """
+    temporary = filename + ".tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(dumps(game, ai, revealed, flags, lost))
+        os.replace(temporary, filename)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def load(filename):
+    """
+    Reads a snapshot from a file.
+    Returns a tuple (game, ai, revealed, flags, lost).
+    """
+    with open(filename, "rb") as f:
+        return loads(f.read())
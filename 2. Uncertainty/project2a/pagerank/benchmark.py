@@ -0,0 +1,152 @@
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from pagerank import (
+    CACHE, DAMPING, METHODS, crawl, iterate_pagerank, link_graph,
+    outofcore_pagerank, sample_pagerank, save_edges, walk_pagerank
+)
+
+
+def power_law_graph(pages, links, rng=random):
+    """
+    Return a corpus of `pages` pages with `links` links per page on
+    average, where both the number of links of a page and how often a
+    page is linked to follow power laws, as on the web.
+    """
+    names = [f"{i}.html" for i in range(pages)]
+
+    # Popularity of each page, so that a few pages get most links,
+    # accumulated once so that choosing each link takes log time
+    popularity = list(itertools.accumulate(
+        rng.paretovariate(1.5) for _ in range(pages)
+    ))
+
+    # Number of links of each page, scaled to the requested average
+    degrees = [rng.paretovariate(2) for _ in range(pages)]
+    scale = links * pages / sum(degrees)
+
+    corpus = dict()
+    for i, name in enumerate(names):
+        count = min(round(degrees[i] * scale), pages - 1)
+        targets = rng.choices(range(pages), cum_weights=popularity, k=count)
+        corpus[name] = set(names[j] for j in targets if j != i)
+    return corpus
+
+
+def write_html(corpus, directory):
+    """
+    Write a corpus as a directory of HTML pages that `crawl` can parse.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<body>\n<h1>{page}</h1>\n")
+            for link in sorted(links):
+                f.write(f'<a href="{link}">{link}</a>\n')
+            f.write("</body>\n</html>\n")
+
+
+def write_edge_list(corpus, path):
+    """
+    Write a corpus as a text file with one "page link" pair per line.
+    """
+    with open(path, "w") as f:
+        for page in sorted(corpus):
+            for link in sorted(corpus[page]):
+                f.write(f"{page} {link}\n")
+
+
+def error(ranks, reference):
+    """Return the L1 distance between two PageRank results."""
+    return sum(abs(ranks[page] - reference[page]) for page in reference)
+
+
+def timed(function, *args, **kwargs):
+    """Return the result of a call and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time PageRank methods on synthetic power-law graphs."
+    )
+    parser.add_argument("--pages", type=int, nargs="+",
+                        default=[1000, 10000])
+    parser.add_argument("--links", type=float, default=8,
+                        help="average number of links per page")
+    parser.add_argument("--samples", type=int, nargs="+",
+                        default=[1000, 10000, 100000])
+    parser.add_argument("--output", metavar="DIRECTORY",
+                        help="where to write generated corpora "
+                             "(a temporary directory by default)")
+    parser.add_argument("--edge-list", action="store_true",
+                        help="also write each corpus as an edge list")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    output = args.output or tempfile.mkdtemp()
+
+    for pages in args.pages:
+        corpus = power_law_graph(pages, args.links, rng)
+        directory = os.path.join(output, f"corpus{pages}")
+        write_html(corpus, directory)
+        if args.edge_list:
+            write_edge_list(corpus, directory + ".txt")
+        edges = sum(len(links) for links in corpus.values())
+        print(f"{pages} pages, {edges} links, in {directory}")
+
+        # Crawling, without and with a saved link cache
+        crawled, seconds = timed(crawl, directory)
+        print(f"  {'crawl':<28} {seconds:>9.4f}s")
+        _, seconds = timed(crawl, directory, cache=CACHE)
+        _, cached = timed(crawl, directory, cache=CACHE)
+        print(f"  {'crawl (cached)':<28} {cached:>9.4f}s")
+        assert crawled == corpus
+
+        # Reference values, iterated to a tight tolerance
+        reference = iterate_pagerank(corpus, DAMPING, tolerance=1e-12)
+
+        for method in METHODS:
+            residuals = []
+            ranks, seconds = timed(
+                iterate_pagerank, corpus, DAMPING,
+                method=method, residuals=residuals
+            )
+            print(f"  {'iterate (' + method + ')':<28} {seconds:>9.4f}s"
+                  f"  {len(residuals):>4} iterations"
+                  f"  error {error(ranks, reference):.2e}")
+
+        # Out of core, from links saved to disk
+        names, offsets, links = link_graph(corpus)
+        sources = np.repeat(np.arange(len(names)), np.diff(offsets))
+        save_edges(directory + ".edges", len(names), [(sources, links)])
+        vector, seconds = timed(
+            outofcore_pagerank, directory + ".edges", DAMPING
+        )
+        ranks = dict(zip(names, vector.tolist()))
+        print(f"  {'out of core':<28} {seconds:>9.4f}s"
+              f"  error {error(ranks, reference):.2e}")
+
+        # Sampling, with error shrinking as the number of samples grows
+        for n in args.samples:
+            ranks, seconds = timed(sample_pagerank, corpus, DAMPING, n)
+            print(f"  {f'sample (n = {n})':<28} {seconds:>9.4f}s"
+                  f"  error {error(ranks, reference):.2e}")
+            ranks, seconds = timed(
+                walk_pagerank, corpus, DAMPING, n, seed=args.seed
+            )
+            print(f"  {f'walk (n = {n})':<28} {seconds:>9.4f}s"
+                  f"  error {error(ranks, reference):.2e}")
+
+
+if __name__ == "__main__":
+    main()